@@ -0,0 +1,58 @@
+import functools
+import logging
+import os
+
+import gspread
+from google.oauth2.service_account import Credentials
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Define the scope
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+
+# Service account key used by default, and the file written by the GitHub Actions workflow
+DEFAULT_CREDENTIALS_FILE = "concise-complex-344219-062a255ca56f.json"
+FALLBACK_CREDENTIALS_FILE = "google-credentials.json"
+
+# Number of keep-alive HTTPS connections kept open to the Google APIs
+HTTP_POOL_SIZE = 20
+
+
+def load_credentials():
+    """
+    Load the service account credentials.
+    Checks GOOGLE_APPLICATION_CREDENTIALS first, then falls back to the file
+    created in the GitHub Actions workflow.
+    """
+    credentials_file = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", DEFAULT_CREDENTIALS_FILE)
+    try:
+        creds = Credentials.from_service_account_file(credentials_file, scopes=SCOPE)
+        logging.info(f"Using credentials from: {credentials_file}")
+        return creds
+    except FileNotFoundError:
+        logging.info(f"Credentials file {credentials_file} not found, trying {FALLBACK_CREDENTIALS_FILE}")
+    try:
+        return Credentials.from_service_account_file(FALLBACK_CREDENTIALS_FILE, scopes=SCOPE)
+    except FileNotFoundError:
+        raise FileNotFoundError(
+            f"Credentials file not found. Tried '{credentials_file}' and '{FALLBACK_CREDENTIALS_FILE}'."
+        ) from None
+
+
+@functools.lru_cache(maxsize=1)
+def get_client():
+    """
+    Return the authorized gspread client, creating it on first use.
+    The credentials are parsed and the HTTP session is set up only once per process.
+    """
+    client = gspread.authorize(load_credentials())
+
+    # Reuse pooled keep-alive connections for every API call instead of paying a new
+    # TLS handshake; only connection failures are retried here, HTTP errors such as
+    # 429 are handled by the callers
+    client.http_client.session.mount("https://", HTTPAdapter(
+        pool_connections=HTTP_POOL_SIZE,
+        pool_maxsize=HTTP_POOL_SIZE,
+        max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.5)
+    ))
+    return client
@@ -1,8 +1,29 @@
 import gspread
-from google.oauth2.service_account import Credentials
 import sys
 import csv
-import os
+import re
+import itertools
+from _auth import get_client
+
+# Number of rows requested per API call while streaming a worksheet to disk
+ROWS_PER_REQUEST = 5000
+
+# Characters that make csv.writer quote a TSV cell
+NEEDS_QUOTING = re.compile(r'[\t\r\n"]')
+
+# Spreadsheet keys are long runs of letters, digits, '-' and '_'
+SPREADSHEET_ID = re.compile(r'^[A-Za-z0-9_-]{20,}$')
+
+
+def write_tsv_rows(f, writer, rows):
+    """
+    Write rows as TSV, joining them directly when no cell needs quoting.
+    The output is the same as writer.writerows(rows).
+    """
+    if len(rows[0]) > 1 and not NEEDS_QUOTING.search("\0".join(itertools.chain.from_iterable(rows))):
+        f.write("".join("\t".join(row) + "\r\n" for row in rows))
+    else:
+        writer.writerows(rows)
 
 
 def main():
@@ -15,47 +36,51 @@ def main():
     OUTPUT_TSV = sys.argv[3]
 
     # Credentials
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    credentials_file = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", "concise-complex-344219-062a255ca56f.json")
-
-    creds = None
     try:
-        creds = Credentials.from_service_account_file(credentials_file, scopes=scope)
-    except FileNotFoundError:
-        # Fallback used in CI or when a different path is set up
-        fallback_file = "google-credentials.json"
-        try:
-            creds = Credentials.from_service_account_file(fallback_file, scopes=scope)
-        except FileNotFoundError:
-            print(f"Error: Credentials file not found. Tried '{credentials_file}' and '{fallback_file}'.")
-            sys.exit(1)
-
-    client = gspread.authorize(creds)
+        client = get_client()
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
     # Open spreadsheet and worksheet
     try:
-        # Try opening by URL, then by key, then by title
+        # Open by URL, by key when the argument looks like one, otherwise by title
         if "docs.google.com" in SPREADSHEET:
             spreadsheet = client.open_by_url(SPREADSHEET)
-        else:
+        elif SPREADSHEET_ID.match(SPREADSHEET):
             try:
                 spreadsheet = client.open_by_key(SPREADSHEET)
-            except Exception:
+            except gspread.exceptions.SpreadsheetNotFound:
+                # Long titles without spaces look like keys too
                 spreadsheet = client.open(SPREADSHEET)
+        else:
+            spreadsheet = client.open(SPREADSHEET)
         sheet = spreadsheet.worksheet(WORKSHEET)
     except Exception as e:
         print(f"Error opening sheet: {e}")
         sys.exit(1)
 
-    # Get all values
-    rows = sheet.get_all_values()
-
-    # Write to TSV
+    # Stream the worksheet to TSV in row stripes so only one stripe is held in memory
+    last_column = gspread.utils.rowcol_to_a1(1, sheet.col_count).rstrip("0123456789")
+    exported_rows = 0
+    blank_rows = 0
+    width = 0
     with open(OUTPUT_TSV, "w", newline="") as f:
         writer = csv.writer(f, delimiter="\t")
-        writer.writerows(rows)
+        for start in range(1, sheet.row_count + 1, ROWS_PER_REQUEST):
+            end = min(start + ROWS_PER_REQUEST - 1, sheet.row_count)
+            rows = sheet.get(f"A{start}:{last_column}{end}")
+            if rows:
+                # Pad rows like get_all_values() does, using the widest row seen so far
+                width = max(width, max(len(row) for row in rows))
+                # The API drops trailing empty rows of each stripe; write them back
+                # only when more data follows
+                write_tsv_rows(f, writer, [[""] * width] * blank_rows + [row + [""] * (width - len(row)) for row in rows])
+                exported_rows += blank_rows + len(rows)
+                blank_rows = 0
+            blank_rows += (end - start + 1) - len(rows)
 
-    print(f"Exported {len(rows)} rows to {OUTPUT_TSV}")
+    print(f"Exported {exported_rows} rows to {OUTPUT_TSV}")
 
 
 if __name__ == "__main__":
@@ -1,14 +1,18 @@
-success_count = 0
-total_count = 0
+import mmap
+import re
+from collections import Counter
 
-with open('jdk-25-build-results.csv', encoding='utf-8') as f:
-    next(f)  # skip header
-    for line in f:
-        parts = line.strip().split(',')
-        if len(parts) == 3:
-            total_count += 1
-            if parts[2] == 'success':
-                success_count += 1
+# Status field of a 3-field line, without trailing whitespace
+STATUS_LINE = re.compile(rb'^[^,\n]*,[^,\n]*,([^,\n]*?)[ \t\r\f\v]*$', re.MULTILINE)
+
+with open('jdk-25-build-results.csv', 'rb') as f:
+    # Scan the mapped file with the regex engine, without reading it into Python lines
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_end = mm.find(b'\n') + 1  # skip header
+        status_counts = Counter(STATUS_LINE.findall(mm, header_end))
+
+total_count = sum(status_counts.values())
+success_count = status_counts[b'success']
 
 success_pct = (success_count / total_count) * 100
 not_success_pct = 100 - success_pct
@@ -193,7 +193,7 @@ check_files_changed() {
     return 1
 }
 
-# Ensure Python dependencies (gspread, google-auth) are available before updating Sheets
+# Ensure Python dependencies (gspread, google-auth, orjson) are available before updating Sheets
 ensure_python_deps() {
     if ! command -v python3 >/dev/null 2>&1; then
         echo "Warning: python3 not found; skipping dependency install."
@@ -201,6 +201,7 @@ ensure_python_deps() {
     fi
     if python3 - <<'PYCHK' >/dev/null 2>&1
 import gspread  # noqa: F401
+import orjson  # noqa: F401
 PYCHK
     then
         return 0
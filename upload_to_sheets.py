@@ -1,25 +1,150 @@
 import gspread
 import gspread.exceptions  # Ensure exceptions are properly referenced if not already imported
-from google.oauth2.service_account import Credentials
-import json
+import orjson
 import time
 import logging
 from datetime import datetime
 import sys
 import re
-from time import sleep
 import random
 import os
 import csv
+import shutil
 import subprocess
+import operator
+import hashlib
+import functools
+import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from _auth import get_client
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logging.info("Starting script...")
 
+# Background colors used to highlight PR rows by state
+STATE_COLORS = {
+    "MERGED": {"red": 0.0, "green": 1.0, "blue": 0.0, "alpha": 1.0},
+    "OPEN": {"red": 1.0, "green": 0.5, "blue": 0.0, "alpha": 1.0},
+    "CLOSED": {"red": 1.0, "green": 0.0, "blue": 0.0, "alpha": 1.0},
+}
+DEFAULT_COLOR = {"red": 1.0, "green": 1.0, "blue": 1.0, "alpha": 1.0}
+
+# Bold, centered column titles on a light gray background
+COLUMN_TITLE_FORMAT = {
+    "textFormat": {
+        "bold": True
+    },
+    "backgroundColor": {
+        "red": 0.9,
+        "green": 0.9,
+        "blue": 0.9,
+        "alpha": 1.0
+    },
+    "horizontalAlignment": "CENTER"
+}
+
+# The note in C1 explaining the purpose of a detail sheet
+NOTE_FORMAT = {
+    "textFormat": {
+        "italic": True
+    }
+}
+
+# Header formats shared by every PR sheet: the "Back to Summary" cell,
+# the title cell and the column titles
+PR_SHEET_HEADER_FORMATS = [
+    ("A1", {
+        "textFormat": {
+            "fontSize": 10
+        }
+    }),
+    ("A2", {
+        "textFormat": {
+            "bold": True,
+            "fontSize": 10
+        },
+        "horizontalAlignment": "LEFT"
+    }),
+    ("A4:E4", COLUMN_TITLE_FORMAT),
+]
+
+# Sheets API write requests allowed per minute and per user, and the send times
+# of the writes made during the last minute
+WRITE_REQUESTS_PER_MINUTE = 60
+recent_writes = deque()
+write_lock = threading.Lock()
+# Monotonic time until which all writes hold off after the API reported a rate limit
+writes_paused_until = 0
+
+# Characters Google Sheets does not allow in worksheet names
+INVALID_SHEET_NAME_CHARS = str.maketrans('', '', '[]\\*?/:')
+
+# Number of batched sheet writes sent concurrently
+UPLOAD_WORKERS = 5
+
+# (rows, cols) of every grid grown by a values write during this run, keyed by
+# sheet id, since the worksheets' own row_count and col_count are not refreshed
+grown_grid_sizes = {}
+grid_sizes_lock = threading.Lock()
+
+# Hidden worksheet holding the content hash of every PR sheet written by the last run
+META_SHEET_TITLE = "Meta"
+
+# Sheets the script writes itself; a PR title sanitized to one of these gets a
+# suffixed sheet instead of overwriting it
+RESERVED_SHEET_TITLES = frozenset((
+    META_SHEET_TITLE, "Summary", "Failing PRs", "Top 250 Plugins",
+    "Local Build Success", "Local Build Tests Pass", "Local Build Tests Fail"
+))
+
+# Layout of a PR sheet: header rows above the PR rows, one column per PR field,
+# plus a few spare rows so small additions do not force a resize
+PR_SHEET_HEADER_ROWS = 4
+PR_SHEET_COLUMNS = 5
+PR_SHEET_SPARE_ROWS = 10
+
+# updateCells cell data coloring a PR row cell by state
+STATE_CELL_FORMATS = {
+    state: {"userEnteredFormat": {"backgroundColor": color}}
+    for state, color in STATE_COLORS.items()
+}
+DEFAULT_CELL_FORMAT = {"userEnteredFormat": {"backgroundColor": DEFAULT_COLOR}}
+
+# Google Sheets refuses to grow a spreadsheet beyond 10 million cells
+SPREADSHEET_CELL_LIMIT = 10_000_000
+
+# Required PR fields and their accepted types, checked in this order
+PR_FIELD_TYPES = (
+    ("title", str),
+    ("repository", str),
+    ("number", (int, str)),  # Allow both int and str
+    ("state", str),
+    ("createdAt", str),
+    ("updatedAt", str),
+    ("checkStatus", (str, type(None)))  # Allow string or None
+)
+VALID_PR_STATES = frozenset(("OPEN", "CLOSED", "MERGED"))
+# Check statuses that put an open PR on the Failing PRs sheet
+FAILING_CHECK_STATUSES = frozenset(("ERROR", "FAILURE"))
+# Marks a field absent from a PR, since None is a valid checkStatus
+MISSING = object()
+
+# Extracts the fields shown on a PR sheet row in one call
+PR_ROW_FIELDS = operator.itemgetter("repository", "number", "state", "createdAt", "updatedAt")
+
+# Whether datetime.fromisoformat understands the Z suffix of GitHub timestamps
+FROMISOFORMAT_ACCEPTS_Z = sys.version_info >= (3, 11)
+
+# Repository and PR number of a GitHub pull request URL
+PR_URL_PATTERN = re.compile(r'https://github\.com/([^/]+/[^/]+)/pull/(\d+)')
+
 def get_backoff_duration(attempt, base_delay=5, max_delay=300):
     """
-    Calculate exponential backoff duration with jitter.
+    Calculate exponential backoff duration with full jitter.
+    The delay is drawn uniformly between zero and the exponential cap, which
+    spreads out the retries of clients that failed at the same time.
     
     Args:
         attempt: The current retry attempt number (0-based)
@@ -29,184 +154,407 @@ def get_backoff_duration(attempt, base_delay=5, max_delay=300):
     Returns:
         Delay duration in seconds
     """
-    delay = min(base_delay * (2 ** attempt), max_delay)
-    jitter = random.uniform(0, 0.1 * delay)  # Add up to 10% jitter
-    return delay + jitter
+    return random.uniform(0, min(base_delay * (2 ** attempt), max_delay))
+
+def get_retry_after(response):
+    """
+    Return the delay in seconds requested by the Retry-After header of a response,
+    or None if there is no usable header.
+    """
+    if response is None:
+        return None
+    try:
+        return max(0.0, float(response.headers.get("Retry-After")))
+    except (TypeError, ValueError):
+        # Missing, or an HTTP date, which the Sheets API does not send
+        return None
 
 def handle_google_api_error(e, attempt, max_retries):
     """
-    Handle different types of Google Sheets API errors.
+    Handle different types of Google Sheets API errors, based on the HTTP status
+    code of the response rather than the error message.
     
     Returns:
         tuple: (should_retry, wait_time)
     """
-    error_str = str(e).lower()
+    response = getattr(e, "response", None)
+    code = response.status_code if response is not None else getattr(e, "code", None)
+    status = e.error.get("status") if isinstance(getattr(e, "error", None), dict) else None
     
     # Rate limit errors
-    if "429" in error_str or "quota" in error_str:
-        wait_time = get_backoff_duration(attempt)
+    if code == 429 or status == "RESOURCE_EXHAUSTED":
+        # Wait as long as the server asks for, if it says
+        retry_after = get_retry_after(response)
+        wait_time = retry_after if retry_after is not None else get_backoff_duration(attempt)
+        # The quota is shared, so the other upload threads back off as well
+        pause_writes(wait_time)
         logging.warning(f"Rate limit exceeded. Attempt {attempt + 1}/{max_retries}. Waiting {wait_time:.1f} seconds...")
         return True, wait_time
     
     # Backend errors (500s)
-    if any(code in error_str for code in ["500", "502", "503", "504"]):
-        wait_time = get_backoff_duration(attempt, base_delay=10)
+    if code is not None and 500 <= code < 600:
+        retry_after = get_retry_after(response)
+        wait_time = retry_after if retry_after is not None else get_backoff_duration(attempt, base_delay=10)
         logging.warning(f"Backend error encountered. Attempt {attempt + 1}/{max_retries}. Waiting {wait_time:.1f} seconds...")
         return True, wait_time
     
     # Authorization errors
-    if "401" in error_str or "403" in error_str:
+    if code in (401, 403):
         logging.error("Authorization error. Please check your credentials.")
         return False, 0
     
     # Invalid request errors
-    if "400" in error_str:
+    if code == 400:
         logging.error("Invalid request error. Please check your input data.")
         return False, 0
     
+    # Other client errors, such as a missing sheet or a conflict, fail the same way on every attempt
+    if code is not None and 400 <= code < 500 and code != 408:
+        logging.error(f"Request failed with status {code}. Not retrying.")
+        return False, 0
+    
     # Default case - retry with standard backoff
     wait_time = get_backoff_duration(attempt)
     logging.warning(f"Unexpected error. Attempt {attempt + 1}/{max_retries}. Waiting {wait_time:.1f} seconds...")
     return True, wait_time
 
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling the Sheets API while the circuit breaker is open.
+    """
+
+class CircuitBreaker:
+    """
+    Stop calling the Sheets API for a while after repeated failures.
+    
+    CLOSED: calls go through. After failure_threshold consecutive failed calls
+    the breaker turns OPEN and every call fails immediately until a jittered
+    cool-down has passed. It then turns HALF_OPEN and lets a single probe call
+    through: a success closes the breaker, a failure opens it again.
+    """
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, failure_threshold=3, cooldown=30):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_until = 0
+        self.lock = threading.Lock()
+
+    def before_call(self):
+        with self.lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() >= self.opened_until:
+                logging.info("Circuit breaker half-open, probing the Sheets API...")
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError("Sheets API circuit breaker is open after repeated failures")
+
+    def record_success(self):
+        with self.lock:
+            if self.state != self.CLOSED:
+                logging.info("Circuit breaker closed, the Sheets API is responding again")
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                cooldown = self.cooldown * random.uniform(1, 1.5)
+                logging.error(f"Circuit breaker open after {self.failures} failed API calls. Pausing API calls for {cooldown:.1f} seconds.")
+                self.state = self.OPEN
+                self.opened_until = time.monotonic() + cooldown
+
+# Shared by every Sheets API call made through retry_with_backoff
+sheets_api_breaker = CircuitBreaker()
+
 def retry_with_backoff(func, max_retries=5, initial_delay=5):
     """
     Retry a function with exponential backoff and improved error handling.
+    Fails fast with CircuitOpenError while the Sheets API circuit breaker is open.
+    The breaker is consulted once per call, so a call it admits keeps all of its
+    retries, and the outcome of that call is always reported back to it.
     """
-    last_error = None
-    
-    for attempt in range(max_retries):
-        try:
-            return func()
-        except gspread.exceptions.APIError as e:
-            should_retry, wait_time = handle_google_api_error(e, attempt, max_retries)
-            if not should_retry or attempt == max_retries - 1:
+    sheets_api_breaker.before_call()
+    succeeded = False
+    try:
+        last_error = None
+        
+        for attempt in range(max_retries):
+            try:
+                result = func()
+                succeeded = True
+                return result
+            except gspread.exceptions.APIError as e:
+                should_retry, wait_time = handle_google_api_error(e, attempt, max_retries)
+                if not should_retry or attempt == max_retries - 1:
+                    raise
+                time.sleep(wait_time)
+                last_error = e
+            except gspread.exceptions.SpreadsheetNotFound:
+                logging.error("Spreadsheet not found. Please check the spreadsheet ID or name.")
                 raise
-            time.sleep(wait_time)
-            last_error = e
-        except gspread.exceptions.SpreadsheetNotFound:
-            logging.error("Spreadsheet not found. Please check the spreadsheet ID or name.")
-            raise
-        except gspread.exceptions.WorksheetNotFound:
-            logging.error("Worksheet not found. Please check the worksheet name.")
-            raise
-        except Exception as e:
-            logging.error(f"Unexpected error: {str(e)}")
-            raise
-    
-    if last_error:
-        raise last_error
-    return None
+            except gspread.exceptions.WorksheetNotFound:
+                logging.error("Worksheet not found. Please check the worksheet name.")
+                raise
+            except Exception as e:
+                logging.error(f"Unexpected error: {str(e)}")
+                raise
+        
+        if last_error:
+            raise last_error
+        succeeded = True
+        return None
+    finally:
+        if succeeded:
+            sheets_api_breaker.record_success()
+        else:
+            sheets_api_breaker.record_failure()
+
+@functools.lru_cache(maxsize=None)
+def parse_iso_date(value):
+    """
+    Parse a GitHub ISO 8601 timestamp such as 2024-12-01T10:00:00Z.
+    Cached, since PRs share timestamps and each one is parsed during validation and grouping.
+    """
+    # Python 3.11+ parses the Z suffix itself
+    if not FROMISOFORMAT_ACCEPTS_Z and value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    return datetime.fromisoformat(value)
 
+@functools.lru_cache(maxsize=None)
 def sanitize_sheet_name(title, max_length=100):
     """
     Sanitize a title to be used as a Google Sheets worksheet name.
     - Removes invalid characters
-    - Truncates to max_length
-    - Ensures uniqueness by adding a counter if needed
+    - Truncates titles longer than max_length, ending them with a short hash of
+      the full title so the name stays stable from run to run
+    Distinct titles can still map to the same name, e.g. when they differ only in
+    removed characters or spaces versus underscores.
     """
     # Remove invalid characters and replace spaces with underscores
-    sanitized = re.sub(r'[\[\]\\*?/:]', '', title)
-    sanitized = sanitized.replace(' ', '_')
+    sanitized = title.translate(INVALID_SHEET_NAME_CHARS).replace(' ', '_')
     
     # Truncate to max_length
     if len(sanitized) > max_length:
-        # Keep the first part of the title and add a hash of the full title
-        hash_suffix = str(hash(title))[-8:]
+        # Keep the first part of the title and add a hash of the full title; unlike
+        # hash(), blake2b gives the same name on every run
+        hash_suffix = hashlib.blake2b(title.encode(), digest_size=4).hexdigest()
         sanitized = sanitized[:max_length-9] + '_' + hash_suffix
     
     return sanitized
 
-def update_sheet_with_retry(sheet, data, range_name="A1"):
+def wait_for_write_quota():
     """
-    Update a sheet with enhanced retry logic and rate limiting.
+    Pace write requests to stay within the per-minute write quota.
+    Only sleeps when the last minute already used up the whole quota, or while
+    writes are paused after a rate limit response. The lock is never held while
+    sleeping, so other threads can still register a pause in the meantime.
     """
-    def update():
-        try:
-            # First clear the entire sheet
-            sheet.clear()
-            time.sleep(1)  # Add a small delay after clearing
-            
-            # Validate data before updating
-            if not data or not isinstance(data, (list, tuple)):
-                raise ValueError("Invalid data format. Expected non-empty list or tuple.")
-            
-            # Then update with new data
-            sheet.update(range_name=range_name, values=data, value_input_option="USER_ENTERED")
-            logging.info(f"Successfully updated sheet with {len(data)} rows of data")
-            time.sleep(2)  # Add delay between operations
-        except gspread.exceptions.APIError as e:
-            logging.error(f"API error during sheet update: {str(e)}")
-            raise
-        except Exception as e:
-            logging.error(f"Error during sheet update: {str(e)}")
-            raise
-    
-    return retry_with_backoff(update)
+    while True:
+        with write_lock:
+            now = time.monotonic()
+            while recent_writes and now - recent_writes[0] >= 60:
+                recent_writes.popleft()
+            if now < writes_paused_until:
+                wait_time = writes_paused_until - now
+                logging.info(f"Writes paused after a rate limit. Waiting {wait_time:.1f} seconds...")
+            elif len(recent_writes) >= WRITE_REQUESTS_PER_MINUTE:
+                wait_time = 60 - (now - recent_writes[0])
+                logging.info(f"Write quota reached. Waiting {wait_time:.1f} seconds...")
+            else:
+                recent_writes.append(now)
+                return
+        # Check the pause and the quota again after waiting
+        time.sleep(wait_time)
 
-def format_sheet_with_retry(sheet, range_name, format_dict):
+def pause_writes(duration):
     """
-    Format a sheet with enhanced retry logic and rate limiting.
+    Hold off every write, including those of other upload threads, for duration seconds.
     """
-    def format():
-        try:
-            sheet.format(range_name, format_dict)
-            logging.info(f"Successfully formatted range {range_name}")
-            time.sleep(2)  # Add delay between operations
-        except Exception as e:
-            logging.error(f"Error during sheet formatting: {str(e)}")
-            raise
-    
-    return retry_with_backoff(format)
+    global writes_paused_until
+    with write_lock:
+        writes_paused_until = max(writes_paused_until, time.monotonic() + duration)
+
+def update_sheets_with_retry(spreadsheet, updates, batch_size=50, value_input_option="USER_ENTERED"):
+    """
+    Overwrite several sheets with values batchUpdate calls and enhanced retry logic.
+    updates is a list of (worksheet, data) pairs, sent at most batch_size sheets per
+    API call, with up to UPLOAD_WORKERS calls in flight at once. Each data is padded
+    with empty cells up to the sheet's grid, so the write also clears whatever the
+    previous run left behind. Values are parsed as typed in the UI unless
+    value_input_option is "RAW".
+    """
+    def update_chunk(chunk):
+        def update():
+            try:
+                value_ranges = []
+                written_sizes = {}
+                for sheet, data in chunk:
+                    # Validate data before updating
+                    if not data or not isinstance(data, (list, tuple)):
+                        raise ValueError(f"Invalid data format for sheet '{sheet.title}'. Expected non-empty list or tuple.")
+
+                    # Pad the data to the full grid instead of clearing the sheet first
+                    with grid_sizes_lock:
+                        grid_rows, grid_cols = grown_grid_sizes.get(sheet.id, (sheet.row_count, sheet.col_count))
+                    rows = max(grid_rows, len(data))
+                    cols = max(grid_cols, max(len(row) for row in data))
+                    padded_data = [list(row) + [""] * (cols - len(row)) for row in data]
+                    padded_data.extend([""] * cols for _ in range(rows - len(data)))
+
+                    value_ranges.append({"range": gspread.utils.absolute_range_name(sheet.title, "A1"), "values": padded_data})
+                    written_sizes[sheet.id] = (rows, cols)
+
+                wait_for_write_quota()
+                spreadsheet.values_batch_update({"valueInputOption": value_input_option, "data": value_ranges})
+                # The API grows the grids to fit, remember their new sizes
+                with grid_sizes_lock:
+                    grown_grid_sizes.update(written_sizes)
+                logging.info(f"Successfully updated {len(chunk)} sheets with {sum(len(data) for _, data in chunk)} rows of data")
+            except gspread.exceptions.APIError as e:
+                logging.error(f"API error during sheet update: {str(e)}")
+                raise
+            except Exception as e:
+                logging.error(f"Error during sheet update: {str(e)}")
+                raise
+
+        retry_with_backoff(update)
+
+    chunks = [updates[start:start + batch_size] for start in range(0, len(updates), batch_size)]
+    if len(chunks) == 1:
+        update_chunk(chunks[0])
+        return
+
+    # Chunks are sent concurrently, so callers must not pass the same sheet twice;
+    # the write quota limiter paces them across threads
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        list(executor.map(update_chunk, chunks))
+
+def update_sheet_with_retry(sheet, data, value_input_option="USER_ENTERED"):
+    """
+    Overwrite a single sheet with enhanced retry logic and rate limiting.
+    """
+    update_sheets_with_retry(sheet.spreadsheet, [(sheet, data)], value_input_option=value_input_option)
+
+def format_request(sheet, range_name, format_dict):
+    """
+    Build the repeatCell request that sheet.format(range_name, format_dict) would send,
+    so it can be shipped in a batch with requests for other sheets.
+    """
+    grid_range = gspread.utils.a1_range_to_grid_range(range_name)
+    grid_range["sheetId"] = sheet.id
+    return {
+        "repeatCell": {
+            "range": grid_range,
+            "cell": {"userEnteredFormat": format_dict},
+            "fields": "userEnteredFormat(" + ",".join(format_dict) + ")"
+        }
+    }
 
-def batch_format_with_retry(sheet, format_requests):
+def batch_update_with_retry(spreadsheet, requests, batch_size=100):
     """
-    Batch format a sheet with enhanced retry logic and rate limiting.
+    Send spreadsheet-level batchUpdate requests with enhanced retry logic.
+    Requests for any number of worksheets are shipped together, at most
+    batch_size requests per API call.
     """
-    def batch_format():
+    for start in range(0, len(requests), batch_size):
+        chunk = requests[start:start + batch_size]
+
+        def batch_update():
+            try:
+                wait_for_write_quota()
+                spreadsheet.batch_update({"requests": chunk})
+                logging.info(f"Successfully applied {len(chunk)} batch update requests")
+            except Exception as e:
+                logging.error(f"Error during batch update: {str(e)}")
+                raise
+
+        retry_with_backoff(batch_update)
+
+def create_worksheets_with_retry(spreadsheet, titles, rows=100, cols=10, hidden=False, grid_sizes=None):
+    """
+    Create several worksheets with a single batchUpdate call and enhanced retry logic.
+    grid_sizes optionally maps a title to its (rows, cols), overriding the defaults.
+    Returns a dict mapping each new title to its worksheet.
+    """
+    grid_sizes = grid_sizes or {}
+    requests = [
+        {
+            "addSheet": {
+                "properties": {
+                    "title": title,
+                    "hidden": hidden,
+                    "gridProperties": {
+                        "rowCount": grid_sizes.get(title, (rows, cols))[0],
+                        "columnCount": grid_sizes.get(title, (rows, cols))[1]
+                    }
+                }
+            }
+        }
+        for title in titles
+    ]
+
+    def create():
         try:
-            sheet.batch_format(format_requests)
-            logging.info(f"Successfully applied {len(format_requests)} format requests")
-            time.sleep(2)  # Add delay between operations
+            wait_for_write_quota()
+            response = spreadsheet.batch_update({"requests": requests})
+            logging.info(f"Successfully created {len(requests)} worksheets")
         except Exception as e:
-            logging.error(f"Error during batch formatting: {str(e)}")
+            logging.error(f"Error during worksheet creation: {str(e)}")
             raise
-    
-    return retry_with_backoff(batch_format)
+
+        created = {}
+        for reply in response["replies"]:
+            properties = reply["addSheet"]["properties"]
+            created[properties["title"]] = gspread.Worksheet(spreadsheet, properties, spreadsheet.id, spreadsheet.client)
+        return created
+
+    return retry_with_backoff(create)
+
+def data_hash(data):
+    """
+    Return the SHA-256 hex digest of the rows about to be written to a sheet.
+    """
+    return hashlib.sha256(orjson.dumps(data)).hexdigest()
+
+def file_digest(path, chunk_size=65536):
+    """
+    Hash a file in fixed-size chunks, without reading it into memory at once.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
 
 def validate_pr_data(pr):
     """
     Validate PR data structure and required fields.
     Returns (is_valid, error_message)
     """
-    required_fields = {
-        "title": str,
-        "repository": str,
-        "number": (int, str),  # Allow both int and str
-        "state": str,
-        "createdAt": str,
-        "updatedAt": str,
-        "checkStatus": (str, type(None))  # Allow string or None
-    }
-    
-    for field, field_type in required_fields.items():
-        if field not in pr:
+    for field, field_type in PR_FIELD_TYPES:
+        # One lookup per field; the sentinel tells a missing field from a None value
+        value = pr.get(field, MISSING)
+        if value is MISSING:
             return False, f"Missing required field: {field}"
-        if not isinstance(pr[field], field_type):
-            if isinstance(field_type, tuple):
-                if not any(isinstance(pr[field], t) for t in field_type):
-                    return False, f"Invalid type for {field}: expected {field_type}, got {type(pr[field])}"
-            else:
-                return False, f"Invalid type for {field}: expected {field_type}, got {type(pr[field])}"
+        # isinstance accepts a tuple of types directly
+        if not isinstance(value, field_type):
+            return False, f"Invalid type for {field}: expected {field_type}, got {type(value)}"
     
     # Validate state values
-    if pr["state"] not in ["OPEN", "CLOSED", "MERGED"]:
+    if pr["state"] not in VALID_PR_STATES:
         return False, f"Invalid state value: {pr['state']}"
     
     # Validate date formats
     try:
-        datetime.fromisoformat(pr["createdAt"].replace("Z", "+00:00"))
-        datetime.fromisoformat(pr["updatedAt"].replace("Z", "+00:00"))
+        parse_iso_date(pr["createdAt"])
+        parse_iso_date(pr["updatedAt"])
     except ValueError as e:
         return False, f"Invalid date format: {e}"
     
@@ -214,30 +562,28 @@ def validate_pr_data(pr):
 
 def group_prs_by_title(prs):
     """
-    Group PRs by title and calculate statistics.
+    Group PRs by title and calculate statistics for each group.
+    Each group also carries the earliest creation and latest update date of its PRs.
     """
-    title_groups = {}
+    prs_by_title = defaultdict(list)
     for pr in prs:
-        title = pr["title"]
-        if title not in title_groups:
-            title_groups[title] = {
-                "title": title,
-                "prs": [],
-                "open": 0,
-                "closed": 0,
-                "merged": 0
-            }
-        
-        group = title_groups[title]
-        group["prs"].append(pr)
-        if pr["state"] == "OPEN":
-            group["open"] += 1
-        elif pr["state"] == "CLOSED":
-            group["closed"] += 1
-        elif pr["state"] == "MERGED":
-            group["merged"] += 1
-    
-    return list(title_groups.values())
+        prs_by_title[pr["title"]].append(pr)
+
+    grouped = []
+    for title, title_prs in prs_by_title.items():
+        # Tally the states of the whole group at once
+        state_counts = Counter(map(operator.itemgetter("state"), title_prs))
+        grouped.append({
+            "title": title,
+            "prs": title_prs,
+            "open": state_counts["OPEN"],
+            "closed": state_counts["CLOSED"],
+            "merged": state_counts["MERGED"],
+            # Already parsed during validation, so these are cache hits
+            "earliest": min(parse_iso_date(pr["createdAt"]) for pr in title_prs),
+            "latest": max(parse_iso_date(pr["updatedAt"]) for pr in title_prs)
+        })
+    return grouped
 
 def process_consolidated_data(consolidated_file):
     """
@@ -245,43 +591,41 @@ def process_consolidated_data(consolidated_file):
     Returns (grouped_prs, failing_prs, errors)
     """
     errors = []
-    valid_prs = []
+    failing_prs = []
     
     try:
-        with open(consolidated_file) as f:
-            prs = json.load(f)
+        with open(consolidated_file, "rb") as f:
+            prs = orjson.loads(f.read())
     except FileNotFoundError:
         return None, None, [f"File {consolidated_file} not found."]
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         return None, None, [f"Error decoding {consolidated_file}."]
     
     if not isinstance(prs, list):
         return None, None, ["Consolidated data must be a list of PRs."]
     
-    # Validate each PR
-    for i, pr in enumerate(prs):
-        is_valid, error = validate_pr_data(pr)
-        if is_valid:
-            valid_prs.append(pr)
-        else:
-            errors.append(f"PR at index {i}: {error}")
-    
-    if not valid_prs:
-        return None, None, ["No valid PRs found in consolidated data."]
+    def valid_prs():
+        """
+        Validate each PR and pick out the failing ones while it is being grouped.
+        """
+        for i, pr in enumerate(prs):
+            is_valid, error = validate_pr_data(pr)
+            if not is_valid:
+                errors.append(f"PR at index {i}: {error}")
+                continue
+            if pr["state"] == "OPEN" and pr["checkStatus"] in FAILING_CHECK_STATUSES:
+                failing_prs.append({
+                    "title": pr["title"],
+                    "url": f"https://github.com/{pr['repository']}/pull/{pr['number']}",
+                    "status": pr["checkStatus"]
+                })
+            yield pr
     
-    # Group valid PRs by title
-    grouped_prs = group_prs_by_title(valid_prs)
+    # Validate, extract failing PRs and group valid PRs by title in a single pass
+    grouped_prs = group_prs_by_title(valid_prs())
     
-    # Extract failing PRs
-    failing_prs = [
-        {
-            "title": pr["title"],
-            "url": f"https://github.com/{pr['repository']}/pull/{pr['number']}",
-            "status": pr["checkStatus"]
-        }
-        for pr in valid_prs
-        if pr["state"] == "OPEN" and pr["checkStatus"] in ["ERROR", "FAILURE"]
-    ]
+    if not grouped_prs:
+        return None, None, ["No valid PRs found in consolidated data."]
     
     return grouped_prs, failing_prs, errors
 
@@ -297,38 +641,34 @@ def process_successful_builds_data(csv_file):
 
     try:
         successful_builds = []
-        with open(csv_file, 'r') as f:
+        with open(csv_file, 'r', newline='') as f:
+            reader = csv.reader(f)
+
             # Skip header line
-            header = f.readline().strip()
-            if not header.startswith("PR_URL,JDK_VERSION"):
+            header = next(reader, [])
+            if header[:2] != ["PR_URL", "JDK_VERSION"]:
                 logging.error(f"Invalid header in {csv_file}. Expected 'PR_URL,JDK_VERSION'")
                 return None
 
-            # Process each line
-            for line in f:
-                line = line.strip()
-                if not line:
+            # Process each row, skipping blank lines
+            for row in reader:
+                if len(row) < 2:
                     continue
 
-                parts = line.split(',')
-                if len(parts) >= 2:
-                    pr_url = parts[0]
-                    jdk_version = parts[1]
-
-                    # Extract PR number and repository from URL
-                    match = re.search(r'https://github.com/([^/]+/[^/]+)/pull/(\d+)', pr_url)
-                    if match:
-                        repo = match.group(1)
-                        pr_number = match.group(2)
-
-                        successful_builds.append({
-                            "pr_url": pr_url,
-                            "jdk_version": jdk_version,
-                            "repository": repo,
-                            "pr_number": pr_number
-                        })
-                    else:
-                        logging.warning(f"Could not parse PR URL: {pr_url}")
+                pr_url = row[0].strip()
+                jdk_version = row[1].strip()
+
+                # Extract PR number and repository from URL
+                match = PR_URL_PATTERN.match(pr_url)
+                if match:
+                    successful_builds.append({
+                        "pr_url": pr_url,
+                        "jdk_version": jdk_version,
+                        "repository": match.group(1),
+                        "pr_number": match.group(2)
+                    })
+                else:
+                    logging.warning(f"Could not parse PR URL: {pr_url}")
 
         return successful_builds
     except Exception as e:
@@ -349,48 +689,43 @@ def process_test_results_data(csv_file):
         'passed': [],
         'failed': []
     }
+    results_by_status = {"TESTS_PASSED": test_results['passed'], "TESTS_FAILED": test_results['failed']}
 
     try:
-        with open(csv_file, 'r') as f:
+        with open(csv_file, 'r', newline='') as f:
+            reader = csv.reader(f)
+
             # Check header
-            header = f.readline().strip()
-            if not header.startswith("PR_URL,JDK_VERSION,TEST_RESULT"):
+            header = next(reader, [])
+            if header[:3] != ["PR_URL", "JDK_VERSION", "TEST_RESULT"]:
                 logging.error(f"Invalid header in {csv_file}. Expected 'PR_URL,JDK_VERSION,TEST_RESULT'")
                 return None
 
-            # Process each line
-            for line in f:
-                line = line.strip()
-                if not line:
+            # Process each row, skipping blank lines
+            for row in reader:
+                if len(row) < 3:
+                    continue
+
+                pr_url = row[0].strip()
+                test_result = row[2].strip()
+
+                # Extract PR number and repository from URL
+                match = PR_URL_PATTERN.match(pr_url)
+                if not match:
+                    logging.warning(f"Could not parse PR URL: {pr_url}")
+                    continue
+
+                results = results_by_status.get(test_result)
+                if results is None:
+                    logging.warning(f"Unknown test result: {test_result} for PR: {pr_url}")
                     continue
 
-                parts = line.split(',')
-                if len(parts) >= 3:
-                    pr_url = parts[0]
-                    jdk_version = parts[1]
-                    test_result = parts[2]
-
-                    # Extract PR number and repository from URL
-                    match = re.search(r'https://github.com/([^/]+/[^/]+)/pull/(\d+)', pr_url)
-                    if match:
-                        repo = match.group(1)
-                        pr_number = match.group(2)
-
-                        pr_data = {
-                            "pr_url": pr_url,
-                            "jdk_version": jdk_version,
-                            "repository": repo,
-                            "pr_number": pr_number
-                        }
-
-                        if test_result == "TESTS_PASSED":
-                            test_results['passed'].append(pr_data)
-                        elif test_result == "TESTS_FAILED":
-                            test_results['failed'].append(pr_data)
-                        else:
-                            logging.warning(f"Unknown test result: {test_result} for PR: {pr_url}")
-                    else:
-                        logging.warning(f"Could not parse PR URL: {pr_url}")
+                results.append({
+                    "pr_url": pr_url,
+                    "jdk_version": row[1].strip(),
+                    "repository": match.group(1),
+                    "pr_number": match.group(2)
+                })
 
         return test_results
     except Exception as e:
@@ -447,22 +782,76 @@ SUCCESSFUL_BUILDS_FILE = os.path.join(os.path.dirname(CONSOLIDATED_FILE), "succe
 TEST_RESULTS_FILE = os.path.join(os.path.dirname(CONSOLIDATED_FILE), "test_results.csv")
 BUILD_RESULTS_FILE = "jdk-25-build-results.csv"
 
-# Define `successful_builds` and `test_results` by invoking the respective processing functions
-successful_builds = process_successful_builds_data(SUCCESSFUL_BUILDS_FILE)
-test_results = process_test_results_data(TEST_RESULTS_FILE)
+# Process successful builds data; a missing or unreadable file means no builds
+successful_builds = process_successful_builds_data(SUCCESSFUL_BUILDS_FILE) or []
+successful_builds_count = len(successful_builds)
+has_successful_local_builds = successful_builds_count > 0
+if has_successful_local_builds:
+    logging.info(f"Found {successful_builds_count} successful local builds")
+else:
+    logging.info("No successful builds found")
 
-# Initialize missing variables to avoid undefined errors
-successful_builds_count = 0
-if successful_builds:
-    successful_builds_count = len(successful_builds)
+# Process test results data, normalized once to a list of PRs per outcome
+logging.info(f"Looking for test results file at: {TEST_RESULTS_FILE}")
+test_results = process_test_results_data(TEST_RESULTS_FILE) or {'passed': [], 'failed': []}
+passed_prs = test_results['passed']
+failed_prs = test_results['failed']
+tests_passed_count = len(passed_prs)
+tests_failed_count = len(failed_prs)
+has_tests_passed = tests_passed_count > 0
+has_tests_failed = tests_failed_count > 0
+logging.info(f"Found {tests_passed_count} PRs with passing tests and {tests_failed_count} PRs with failing tests")
 
-tests_passed_count = 0
-if test_results and 'passed' in test_results:
-    tests_passed_count = len(test_results['passed'])
+# Debug logs for the flags
+logging.info(f"has_successful_local_builds flag is set to: {has_successful_local_builds}")
+logging.info(f"has_tests_passed flag is set to: {has_tests_passed}")
+logging.info(f"has_tests_failed flag is set to: {has_tests_failed}")
 
-tests_failed_count = 0
-if test_results and 'failed' in test_results:
-    tests_failed_count = len(test_results['failed'])
+# Check if successful builds file has changed since last run
+def has_successful_builds_changed():
+    """
+    Check if the successful_builds.csv file has changed since the last run.
+    Returns True if the file has changed or if it's the first run.
+    """
+    last_run_file = os.path.join(os.path.dirname(SUCCESSFUL_BUILDS_FILE), "last_successful_builds.csv")
+
+    # If the successful builds file doesn't exist, return False (no changes)
+    if not os.path.exists(SUCCESSFUL_BUILDS_FILE):
+        logging.info("Successful builds file doesn't exist.")
+        return False
+
+    # If the last run file doesn't exist, this is the first run
+    if not os.path.exists(last_run_file):
+        logging.info("First run for successful builds tracking.")
+        # Create a copy for future comparison
+        try:
+            shutil.copy2(SUCCESSFUL_BUILDS_FILE, last_run_file)
+            logging.info(f"Created initial copy of successful builds file at {last_run_file}")
+        except Exception as e:
+            logging.error(f"Error creating copy of successful builds file: {str(e)}")
+        return True
+
+    # Compare the current file with the last run file
+    try:
+        # Files of different sizes differ, otherwise compare digests streamed in chunks
+        if (os.path.getsize(SUCCESSFUL_BUILDS_FILE) != os.path.getsize(last_run_file) or
+                file_digest(SUCCESSFUL_BUILDS_FILE) != file_digest(last_run_file)):
+            logging.info("Successful builds file has changed since last run.")
+            # Update the last run file
+            shutil.copyfile(SUCCESSFUL_BUILDS_FILE, last_run_file)
+            return True
+        else:
+            logging.info("Successful builds file has not changed since last run.")
+            return False
+    except Exception as e:
+        logging.error(f"Error comparing successful builds files: {str(e)}")
+        return True  # Default to updating if there's an error
+
+# Check if successful builds have changed
+successful_builds_changed = has_successful_builds_changed()
+
+# Process the top 250 plugins build results
+top_250_plugins_results = process_top_250_plugins_data(BUILD_RESULTS_FILE)
 
 # Process consolidated data
 grouped_prs, failing_prs, errors = process_consolidated_data(CONSOLIDATED_FILE)
@@ -475,34 +864,62 @@ if errors:
     else:  # Non-fatal errors
         logging.warning("Some PRs were invalid but processing will continue.")
 
-# Define the scope
-scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-
-# Add your service account credentials
-# Check for environment variable first, then fall back to local file
-credentials_file = os.environ.get('GOOGLE_APPLICATION_CREDENTIALS', 'concise-complex-344219-062a255ca56f.json')
-try:
-    creds = Credentials.from_service_account_file(credentials_file, scopes=scope)
-    logging.info(f"Using credentials from: {credentials_file}")
-except FileNotFoundError:
-    # For GitHub Actions, try the file we created in the workflow
-    fallback_file = 'google-credentials.json'
-    logging.info(f"Credentials file {credentials_file} not found, trying {fallback_file}")
-    creds = Credentials.from_service_account_file(fallback_file, scopes=scope)
-
 # Authorize the client
-client = gspread.authorize(creds)
+client = get_client()
 
 # Open the Google Sheet by name or ID
 spreadsheet = client.open("Jenkins PR Tracker")  # or use client.open_by_key("YOUR_SHEET_ID")
 
-# Create a summary sheet
-try:
-    summary_sheet = spreadsheet.worksheet("Summary")
-    logging.info("Summary sheet already exists. Updating it...")
-except gspread.exceptions.WorksheetNotFound:
-    logging.info("Creating new Summary sheet...")
-    summary_sheet = spreadsheet.add_worksheet(title="Summary", rows=100, cols=10)
+# Fetch the worksheet list once; sheets created later are added to this dict
+worksheets_by_title = {ws.title: ws for ws in spreadsheet.worksheets()}
+
+# Read the sheet hashes recorded by the previous run, skipping the header row
+previous_hashes = {}
+if META_SHEET_TITLE in worksheets_by_title:
+    meta_rows = retry_with_backoff(lambda: worksheets_by_title[META_SHEET_TITLE].get("A2:B"))
+    previous_hashes = {row[0]: row[1] for row in meta_rows if len(row) >= 2}
+# Hashes of the sheets that exist at startup; a sheet deleted since the last run is
+# re-created empty, so its old hash must not let its write be skipped
+startup_hashes = {title: h for title, h in previous_hashes.items() if title in worksheets_by_title}
+# Sheets left untouched by this run keep their hash; deleted sheets are dropped
+current_hashes = dict(startup_hashes)
+
+def sheet_is_unchanged(title, content_hash):
+    """
+    Check whether a sheet already held exactly this content when the run started.
+    Never true when the update is forced, so a forced run also repairs sheets
+    that were edited by hand.
+    """
+    return not FORCE_UPDATE and startup_hashes.get(title) == content_hash
+
+# Sheet writes, sent together with the summary and PR sheets at the end of the run
+pending_sheet_updates = []
+
+def update_sheet_if_changed(sheet, data, format_requests=()):
+    """
+    Queue a sheet write unless the sheet already holds exactly this data, as
+    recorded by the previous run. The format requests are only sent along with
+    the write, so an unchanged sheet costs no API call at all.
+    """
+    content_hash = data_hash(data)
+    if sheet_is_unchanged(sheet.title, content_hash):
+        logging.info(f"Sheet '{sheet.title}' is unchanged. Skipping.")
+        return
+    pending_sheet_updates.append((sheet, data, content_hash, list(format_requests)))
+
+def get_or_create_worksheet_with_retry(spreadsheet, sheet_name, rows=100, cols=10):
+    """
+    Get a worksheet from the cached worksheet list, creating it if it does not exist yet.
+    """
+    worksheet = worksheets_by_title.get(sheet_name)
+    if worksheet is not None:
+        logging.info(f"{sheet_name} sheet already exists. Updating it...")
+        return worksheet
+
+    logging.info(f"Creating new {sheet_name} sheet...")
+    worksheet = create_worksheets_with_retry(spreadsheet, [sheet_name], rows=rows, cols=cols)[sheet_name]
+    worksheets_by_title[sheet_name] = worksheet
+    return worksheet
 
 # Prepare summary data
 total_prs = 0
@@ -510,11 +927,6 @@ open_prs = 0
 closed_prs = 0
 merged_prs = 0
 plugin_stats = {}
-earliest_date = None
-latest_date = None
-has_successful_local_builds = False  # Flag to track if we have successful local builds
-has_tests_passed = False  # Flag to track if we have PRs with passing tests
-has_tests_failed = False  # Flag to track if we have PRs with failing tests
 
 for pr in grouped_prs:
     title = pr["title"]
@@ -532,15 +944,9 @@ for pr in grouped_prs:
         "merged": pr["merged"]
     }
 
-    # Find the earliest and latest dates
-    for p in prs:
-        created_at = datetime.fromisoformat(p["createdAt"].replace("Z", "+00:00"))
-        updated_at = datetime.fromisoformat(p["updatedAt"].replace("Z", "+00:00"))
-
-        if earliest_date is None or created_at < earliest_date:
-            earliest_date = created_at
-        if latest_date is None or updated_at > latest_date:
-            latest_date = updated_at
+# Find the earliest and latest dates from the per-title extremes computed while grouping
+earliest_date = min(pr["earliest"] for pr in grouped_prs)
+latest_date = max(pr["latest"] for pr in grouped_prs)
 
 # Calculate percentages
 open_percentage = (open_prs / total_prs) * 100 if total_prs > 0 else 0
@@ -558,30 +964,63 @@ summary_data = [
 ]
 
 # Function to safely get worksheet ID with retry
-def get_worksheet_id_with_retry(spreadsheet, sheet_name, max_retries=3):
+def get_worksheet_id_with_retry(spreadsheet, sheet_name):
     """
-    Safely get a worksheet ID with retry logic for rate limiting.
+    Get a worksheet ID from the cached worksheet list.
     """
-    for attempt in range(max_retries):
-        try:
-            worksheet = spreadsheet.worksheet(sheet_name)
-            return worksheet.id
-        except gspread.exceptions.APIError as e:
-            if "429" in str(e) and attempt < max_retries - 1:
-                wait_time = get_backoff_duration(attempt, base_delay=20)
-                logging.warning(f"Rate limit hit when getting worksheet ID. Waiting {wait_time:.1f} seconds...")
-                time.sleep(wait_time)
-            elif "404" in str(e) or "RESOURCE_NOT_FOUND" in str(e):
-                logging.warning(f"Worksheet '{sheet_name}' not found")
-                return None
-            else:
-                logging.error(f"Error getting worksheet ID: {str(e)}")
-                return None
-        except Exception as e:
-            logging.error(f"Unexpected error getting worksheet ID: {str(e)}")
-            return None
+    worksheet = worksheets_by_title.get(sheet_name)
+    if worksheet is None:
+        logging.warning(f"Worksheet '{sheet_name}' not found")
+        return None
+    return worksheet.id
+
+# Create all missing sheets (Summary, plugin sheets, detail sheets, Top 250 Plugins and
+# Failing PRs) in a single request
+plugin_sheet_names = {}
+for plugin in plugin_stats:
+    sheet_name = sanitize_sheet_name(plugin)
+    if sheet_name in RESERVED_SHEET_TITLES:
+        sheet_name = f"{sheet_name} PRs"
+    if sheet_name:
+        plugin_sheet_names[plugin] = sheet_name
+    else:
+        logging.error(f"Invalid sheet name generated for plugin '{plugin}'. Skipping sheet creation.")
+required_sheet_names = ["Summary", *plugin_sheet_names.values()]
+if failing_prs and isinstance(failing_prs, list):
+    required_sheet_names.append("Failing PRs")
+# The detail sheets written below, so the summary can link to them on the first run
+if has_successful_local_builds and (successful_builds_changed or FORCE_UPDATE):
+    required_sheet_names.append("Local Build Success")
+if has_tests_passed and FORCE_UPDATE:
+    required_sheet_names.append("Local Build Tests Pass")
+if has_tests_failed and FORCE_UPDATE:
+    required_sheet_names.append("Local Build Tests Fail")
+if top_250_plugins_results:
+    required_sheet_names.append("Top 250 Plugins")
+missing_sheet_names = [
+    name for name in dict.fromkeys(required_sheet_names)
+    if name and name not in worksheets_by_title
+]
+if missing_sheet_names:
+    # Size each new plugin sheet to fit its PRs so the first update does not have to grow it
+    grid_sizes = {}
+    for plugin, name in plugin_sheet_names.items():
+        if name in missing_sheet_names:
+            rows = max(grid_sizes.get(name, (0, 0))[0], PR_SHEET_HEADER_ROWS + plugin_stats[plugin]["total"] + PR_SHEET_SPARE_ROWS)
+            grid_sizes[name] = (rows, PR_SHEET_COLUMNS)
+
+    # Fail early rather than on whichever update crosses the spreadsheet cell limit
+    existing_cells = sum(ws.row_count * ws.col_count for ws in worksheets_by_title.values())
+    new_cells = sum(rows * cols for rows, cols in (grid_sizes.get(name, (100, 10)) for name in missing_sheet_names))
+    if existing_cells + new_cells > SPREADSHEET_CELL_LIMIT:
+        logging.error(f"Creating {len(missing_sheet_names)} sheets would use {existing_cells + new_cells} cells, "
+                      f"more than the {SPREADSHEET_CELL_LIMIT} cells a spreadsheet can hold.")
+        sys.exit(1)
+
+    logging.info(f"Creating {len(missing_sheet_names)} new sheets...")
+    worksheets_by_title.update(create_worksheets_with_retry(spreadsheet, missing_sheet_names, grid_sizes=grid_sizes))
 
-    return None
+summary_sheet = worksheets_by_title["Summary"]
 
 # Add successful local builds section if we have any
 if has_successful_local_builds:
@@ -604,8 +1043,6 @@ else:
 # Add tests passed section if we have any
 if has_tests_passed:
     logging.info("Attempting to add Tests Passed section to summary data")
-    # Wait a bit to avoid rate limiting
-    time.sleep(2)
     tests_passed_sheet_id = get_worksheet_id_with_retry(spreadsheet, "Local Build Tests Pass")
 
     if tests_passed_sheet_id:
@@ -624,8 +1061,6 @@ else:
 # Add tests failed section if we have any
 if has_tests_failed:
     logging.info("Attempting to add Tests Failed section to summary data")
-    # Wait a bit to avoid rate limiting
-    time.sleep(2)
     tests_failed_sheet_id = get_worksheet_id_with_retry(spreadsheet, "Local Build Tests Fail")
 
     if tests_failed_sheet_id:
@@ -648,367 +1083,145 @@ summary_data.extend([
     ["Plugin", "Total PRs", "Open PRs", "Closed PRs", "Merged PRs", "Link to Sheet"]
 ])
 
-# Add plugin-specific stats and links to individual sheets
-for plugin, stats in plugin_stats.items():
-    sheet_name = sanitize_sheet_name(plugin)
-    if not sheet_name:
-        logging.error(f"Invalid sheet name generated for plugin '{plugin}'. Skipping sheet creation.")
-        continue
-
-    try:
-        plugin_sheet = spreadsheet.worksheet(sheet_name)
-    except gspread.exceptions.WorksheetNotFound:
-        logging.info(f"Creating new sheet for '{sheet_name}'...")
-        plugin_sheet = spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=10)
-
-    link = f'=HYPERLINK("#gid={plugin_sheet.id}"; "{plugin}")'
-    summary_data.append([
+# Add plugin-specific stats and links to individual sheets; plugins without a
+# valid sheet name were already reported and left out
+summary_data.extend(
+    [
         plugin,
         stats["total"],
         stats["open"],
         stats["closed"],
         stats["merged"],
-        link
-    ])
+        f'=HYPERLINK("#gid={worksheets_by_title[sheet_name].id}"; "{plugin}")'
+    ]
+    for plugin, sheet_name in plugin_sheet_names.items()
+    for stats in [plugin_stats[plugin]]
+)
 
 # Get the Summary sheet ID for the "Back to Summary" link
 summary_sheet_id = summary_sheet.id
 
-# Process successful builds data
-successful_builds = process_successful_builds_data(SUCCESSFUL_BUILDS_FILE)
-
-# Update the flag if we have successful builds
-if successful_builds and isinstance(successful_builds, list) and len(successful_builds) > 0:
-    has_successful_local_builds = True
-    successful_builds_count = len(successful_builds)
-    logging.info(f"Found {successful_builds_count} successful local builds")
-else:
-    logging.info(f"No successful builds found or invalid format: {successful_builds}")
-
-# Process test results data
-logging.info(f"Looking for test results file at: {TEST_RESULTS_FILE}")
-test_results = process_test_results_data(TEST_RESULTS_FILE)
-
-# Set flags for test results
-has_tests_passed = False
-has_tests_failed = False
-tests_passed_count = 0
-tests_failed_count = 0
-
-if test_results and isinstance(test_results, dict):
-    if 'passed' in test_results and len(test_results['passed']) > 0:
-        has_tests_passed = True
-        tests_passed_count = len(test_results['passed'])
-        logging.info(f"Found {tests_passed_count} PRs with passing tests")
-    else:
-        logging.info("No PRs with passing tests found in test results")
-
-    if 'failed' in test_results and len(test_results['failed']) > 0:
-        has_tests_failed = True
-        tests_failed_count = len(test_results['failed'])
-        logging.info(f"Found {tests_failed_count} PRs with failing tests")
-    else:
-        logging.info("No PRs with failing tests found in test results")
-else:
-    logging.info(f"No test results found or invalid format: {test_results}")
-
-# Force the flags to true for testing purposes
-if FORCE_UPDATE:
-    logging.info("Force update is enabled, setting test result flags to true for testing")
-    has_tests_passed = True
-    has_tests_failed = True
-    tests_passed_count = 0
-    tests_failed_count = 0
-
-# Debug logs for the flags
-logging.info(f"has_successful_local_builds flag is set to: {has_successful_local_builds}")
-logging.info(f"has_tests_passed flag is set to: {has_tests_passed}")
-logging.info(f"has_tests_failed flag is set to: {has_tests_failed}")
-
-# Check if successful builds file has changed since last run
-def has_successful_builds_changed():
-    """
-    Check if the successful_builds.csv file has changed since the last run.
-    Returns True if the file has changed or if it's the first run.
-    """
-    last_run_file = os.path.join(os.path.dirname(SUCCESSFUL_BUILDS_FILE), "last_successful_builds.csv")
-
-    # If the successful builds file doesn't exist, return False (no changes)
-    if not os.path.exists(SUCCESSFUL_BUILDS_FILE):
-        logging.info("Successful builds file doesn't exist.")
-        return False
-
-    # If the last run file doesn't exist, this is the first run
-    if not os.path.exists(last_run_file):
-        logging.info("First run for successful builds tracking.")
-        # Create a copy for future comparison
-        try:
-            import shutil
-            shutil.copy2(SUCCESSFUL_BUILDS_FILE, last_run_file)
-            logging.info(f"Created initial copy of successful builds file at {last_run_file}")
-        except Exception as e:
-            logging.error(f"Error creating copy of successful builds file: {str(e)}")
-        return True
-
-    # Compare the current file with the last run file
-    try:
-        with open(SUCCESSFUL_BUILDS_FILE, 'r') as f1, open(last_run_file, 'r') as f2:
-            current_content = f1.read()
-            last_content = f2.read()
-
-            if current_content != last_content:
-                logging.info("Successful builds file has changed since last run.")
-                # Update the last run file
-                with open(last_run_file, 'w') as f:
-                    f.write(current_content)
-                return True
-            else:
-                logging.info("Successful builds file has not changed since last run.")
-                return False
-    except Exception as e:
-        logging.error(f"Error comparing successful builds files: {str(e)}")
-        return True  # Default to updating if there's an error
-
-# Check if successful builds have changed
-successful_builds_changed = has_successful_builds_changed()
-
 # Create and update the successful builds sheet
-if (successful_builds and isinstance(successful_builds, list) and len(successful_builds) > 0 and
-    (successful_builds_changed or FORCE_UPDATE)):
-    logging.info(f"Found {len(successful_builds)} successful builds to add to the sheet")
+if has_successful_local_builds and (successful_builds_changed or FORCE_UPDATE):
+    logging.info(f"Found {successful_builds_count} successful builds to add to the sheet")
     logging.info(f"Updating sheet because: changed={successful_builds_changed}, force={FORCE_UPDATE}")
     try:
-        try:
-            successful_builds_sheet = spreadsheet.worksheet("Local Build Success")
-            logging.info("Local Build Success sheet already exists. Updating it...")
-        except gspread.exceptions.WorksheetNotFound:
-            logging.info("Creating new Local Build Success sheet...")
-            successful_builds_sheet = spreadsheet.add_worksheet(title="Local Build Success", rows=100, cols=10)
+        successful_builds_sheet = get_or_create_worksheet_with_retry(spreadsheet, "Local Build Success")
 
         # Prepare the data for the successful builds sheet
         successful_builds_data = [
-            ["Back to Summary", f'=HYPERLINK("#gid={summary_sheet_id}"; "Back to Summary")', "", "", ""],
+            ["Back to Summary", f'=HYPERLINK("#gid={summary_sheet_id}"; "Back to Summary")', "PRs that build successfully locally but fail on Jenkins", "", ""],
             ["", "", "", "", ""],  # Empty row for spacing
-            ["Repository", "PR Number", "PR URL", "JDK Version", "Status"]
+            ["Repository", "PR Number", "PR URL", "JDK Version", "Status"],
+            # One row per successful build
+            *(
+                [
+                    build["repository"],
+                    build["pr_number"],
+                    f'=HYPERLINK("{build["pr_url"]}"; "PR #{build["pr_number"]}")',
+                    build["jdk_version"],
+                    "Builds locally"
+                ]
+                for build in successful_builds
+            )
         ]
 
-        # Process each successful build
-        for build in successful_builds:
-            successful_builds_data.append([
-                build["repository"],
-                build["pr_number"],
-                f'=HYPERLINK("{build["pr_url"]}"; "PR #{build["pr_number"]}")',
-                build["jdk_version"],
-                "Builds locally"
-            ])
-
-        # Update the successful builds sheet
-        update_sheet_with_retry(successful_builds_sheet, successful_builds_data)
-
-        # Format the header row
-        format_sheet_with_retry(successful_builds_sheet, "A3:E3", {
-            "textFormat": {
-                "bold": True
-            },
-            "backgroundColor": {
-                "red": 0.9,
-                "green": 0.9,
-                "blue": 0.9,
-                "alpha": 1.0
-            },
-            "horizontalAlignment": "CENTER"
-        })
-
-        # Add a note to the sheet explaining its purpose
-        successful_builds_sheet.update_cell(1, 3, "PRs that build successfully locally but fail on Jenkins")
-        format_sheet_with_retry(successful_builds_sheet, "C1", {
-            "textFormat": {
-                "italic": True
-            }
-        })
+        # Queue the sheet with its column titles and the italic note in C1
+        update_sheet_if_changed(successful_builds_sheet, successful_builds_data, [
+            format_request(successful_builds_sheet, "A3:E3", COLUMN_TITLE_FORMAT),
+            format_request(successful_builds_sheet, "C1", NOTE_FORMAT)
+        ])
 
         # We no longer need to add a link here as we've already added it to the summary data
         logging.info("Successfully created/updated Local Build Success sheet")
     except Exception as e:
         logging.error(f"Error creating/updating Local Build Success sheet: {str(e)}")
-elif successful_builds and isinstance(successful_builds, list) and len(successful_builds) > 0:
-    logging.info(f"Found {len(successful_builds)} successful builds but skipping update because no changes detected and force update not enabled")
+elif has_successful_local_builds:
+    logging.info(f"Found {successful_builds_count} successful builds but skipping update because no changes detected and force update not enabled")
 else:
     logging.info("No successful builds found or successful_builds.csv file not available")
 
-# Function to safely get or create worksheet with retry
-def get_or_create_worksheet_with_retry(spreadsheet, sheet_name, rows=100, cols=10, max_retries=3):
-    """
-    Safely get or create a worksheet with retry logic for rate limiting.
-    """
-    for attempt in range(max_retries):
-        try:
-            try:
-                worksheet = spreadsheet.worksheet(sheet_name)
-                logging.info(f"{sheet_name} sheet already exists. Updating it...")
-                return worksheet
-            except gspread.exceptions.WorksheetNotFound:
-                logging.info(f"Creating new {sheet_name} sheet...")
-                # Add a delay before creating to avoid rate limits
-                time.sleep(2)
-                return spreadsheet.add_worksheet(title=sheet_name, rows=rows, cols=cols)
-        except gspread.exceptions.APIError as e:
-            if "429" in str(e) and attempt < max_retries - 1:
-                wait_time = get_backoff_duration(attempt, base_delay=20)
-                logging.warning(f"Rate limit hit when creating worksheet. Waiting {wait_time:.1f} seconds...")
-                time.sleep(wait_time)
-            else:
-                logging.error(f"API error creating worksheet: {str(e)}")
-                raise
-        except Exception as e:
-            logging.error(f"Unexpected error creating worksheet: {str(e)}")
-            raise
-
-    raise Exception(f"Failed to get or create worksheet {sheet_name} after {max_retries} attempts")
-
 # Create and update the tests passed sheet
 if has_tests_passed and FORCE_UPDATE:
-    passed_count = len(test_results['passed']) if test_results and isinstance(test_results, dict) and 'passed' in test_results else 0
-    logging.info(f"Found {passed_count} PRs with passing tests to add to the sheet")
+    logging.info(f"Found {tests_passed_count} PRs with passing tests to add to the sheet")
     logging.info(f"Updating tests passed sheet because: force={FORCE_UPDATE}")
     try:
-        # Wait a bit to avoid rate limiting
-        time.sleep(5)
         tests_passed_sheet = get_or_create_worksheet_with_retry(spreadsheet, "Local Build Tests Pass")
 
         # Prepare the data for the tests passed sheet
         tests_passed_data = [
-            ["Back to Summary", f'=HYPERLINK("#gid={summary_sheet_id}"; "Back to Summary")', "", "", ""],
+            ["Back to Summary", f'=HYPERLINK("#gid={summary_sheet_id}"; "Back to Summary")', "PRs that build successfully locally and pass tests", "", ""],
             ["", "", "", "", ""],  # Empty row for spacing
             ["Repository", "PR Number", "PR URL", "JDK Version", "Status"]
         ]
 
-        # Process each PR with passing tests
-        if test_results and isinstance(test_results, dict) and 'passed' in test_results:
-            for pr in test_results['passed']:
-                tests_passed_data.append([
-                    pr["repository"],
-                    pr["pr_number"],
-                    f'=HYPERLINK("{pr["pr_url"]}"; "PR #{pr["pr_number"]}")',
-                    pr["jdk_version"],
-                    "Tests Passed"
-                ])
-        else:
-            # Add a placeholder row if no data
-            tests_passed_data.append([
-                "No data available",
-                "",
-                "",
-                "",
-                ""
-            ])
-
-        # Update the tests passed sheet
-        update_sheet_with_retry(tests_passed_sheet, tests_passed_data)
-
-        # Format the header row
-        format_sheet_with_retry(tests_passed_sheet, "A3:E3", {
-            "textFormat": {
-                "bold": True
-            },
-            "backgroundColor": {
-                "red": 0.9,
-                "green": 0.9,
-                "blue": 0.9,
-                "alpha": 1.0
-            },
-            "horizontalAlignment": "CENTER"
-        })
+        # Add one row per PR with passing tests, built in a single list
+        tests_passed_data.extend([
+            [
+                pr["repository"],
+                pr["pr_number"],
+                f'=HYPERLINK("{pr["pr_url"]}"; "PR #{pr["pr_number"]}")',
+                pr["jdk_version"],
+                "Tests Passed"
+            ]
+            for pr in passed_prs
+        ])
 
-        # Add a note to the sheet explaining its purpose
-        tests_passed_sheet.update_cell(1, 3, "PRs that build successfully locally and pass tests")
-        format_sheet_with_retry(tests_passed_sheet, "C1", {
-            "textFormat": {
-                "italic": True
-            }
-        })
+        # Queue the sheet with its column titles and the italic note in C1
+        update_sheet_if_changed(tests_passed_sheet, tests_passed_data, [
+            format_request(tests_passed_sheet, "A3:E3", COLUMN_TITLE_FORMAT),
+            format_request(tests_passed_sheet, "C1", NOTE_FORMAT)
+        ])
 
         logging.info("Successfully created/updated Local Build Tests Pass sheet")
     except Exception as e:
         logging.error(f"Error creating/updating Local Build Tests Pass sheet: {str(e)}")
-elif test_results and isinstance(test_results, dict) and 'passed' in test_results and len(test_results['passed']) > 0:
-    logging.info(f"Found {len(test_results['passed'])} PRs with passing tests but skipping update because force update not enabled")
+elif has_tests_passed:
+    logging.info(f"Found {tests_passed_count} PRs with passing tests but skipping update because force update not enabled")
 else:
     logging.info("No PRs with passing tests found or test_results.csv file not available")
 
 # Create and update the tests failed sheet
 if has_tests_failed and FORCE_UPDATE:
-    failed_count = len(test_results['failed']) if test_results and isinstance(test_results, dict) and 'failed' in test_results else 0
-    logging.info(f"Found {failed_count} PRs with failing tests to add to the sheet")
+    logging.info(f"Found {tests_failed_count} PRs with failing tests to add to the sheet")
     logging.info(f"Updating tests failed sheet because: force={FORCE_UPDATE}")
     try:
-        # Wait a bit to avoid rate limiting
-        time.sleep(5)
         tests_failed_sheet = get_or_create_worksheet_with_retry(spreadsheet, "Local Build Tests Fail")
 
         # Prepare the data for the tests failed sheet
         tests_failed_data = [
-            ["Back to Summary", f'=HYPERLINK("#gid={summary_sheet_id}"; "Back to Summary")', "", "", ""],
+            ["Back to Summary", f'=HYPERLINK("#gid={summary_sheet_id}"; "Back to Summary")', "PRs that build successfully locally but fail tests", "", ""],
             ["", "", "", "", ""],  # Empty row for spacing
             ["Repository", "PR Number", "PR URL", "JDK Version", "Status"]
         ]
 
-        # Process each PR with failing tests
-        if test_results and isinstance(test_results, dict) and 'failed' in test_results:
-            for pr in test_results['failed']:
-                tests_failed_data.append([
-                    pr["repository"],
-                    pr["pr_number"],
-                    f'=HYPERLINK("{pr["pr_url"]}"; "PR #{pr["pr_number"]}")',
-                    pr["jdk_version"],
-                    "Tests Failed"
-                ])
-        else:
-            # Add a placeholder row if no data
-            tests_failed_data.append([
-                "No data available",
-                "",
-                "",
-                "",
-                ""
-            ])
-
-        # Update the tests failed sheet
-        update_sheet_with_retry(tests_failed_sheet, tests_failed_data)
-
-        # Format the header row
-        format_sheet_with_retry(tests_failed_sheet, "A3:E3", {
-            "textFormat": {
-                "bold": True
-            },
-            "backgroundColor": {
-                "red": 0.9,
-                "green": 0.9,
-                "blue": 0.9,
-                "alpha": 1.0
-            },
-            "horizontalAlignment": "CENTER"
-        })
+        # Add one row per PR with failing tests, built in a single list
+        tests_failed_data.extend([
+            [
+                pr["repository"],
+                pr["pr_number"],
+                f'=HYPERLINK("{pr["pr_url"]}"; "PR #{pr["pr_number"]}")',
+                pr["jdk_version"],
+                "Tests Failed"
+            ]
+            for pr in failed_prs
+        ])
 
-        # Add a note to the sheet explaining its purpose
-        tests_failed_sheet.update_cell(1, 3, "PRs that build successfully locally but fail tests")
-        format_sheet_with_retry(tests_failed_sheet, "C1", {
-            "textFormat": {
-                "italic": True
-            }
-        })
+        # Queue the sheet with its column titles and the italic note in C1
+        update_sheet_if_changed(tests_failed_sheet, tests_failed_data, [
+            format_request(tests_failed_sheet, "A3:E3", COLUMN_TITLE_FORMAT),
+            format_request(tests_failed_sheet, "C1", NOTE_FORMAT)
+        ])
 
         logging.info("Successfully created/updated Local Build Tests Fail sheet")
     except Exception as e:
         logging.error(f"Error creating/updating Local Build Tests Fail sheet: {str(e)}")
-elif test_results and isinstance(test_results, dict) and 'failed' in test_results and len(test_results['failed']) > 0:
-    logging.info(f"Found {len(test_results['failed'])} PRs with failing tests but skipping update because force update not enabled")
+elif has_tests_failed:
+    logging.info(f"Found {tests_failed_count} PRs with failing tests but skipping update because force update not enabled")
 else:
     logging.info("No PRs with failing tests found or test_results.csv file not available")
 
-# Process the top 250 plugins build results
-top_250_plugins_results = process_top_250_plugins_data(BUILD_RESULTS_FILE)
-
+# Create and update the Top 250 Plugins sheet
 if top_250_plugins_results:
     try:
         # Create or update the "Top 250 Plugins" sheet
@@ -1044,40 +1257,23 @@ if top_250_plugins_results:
             ["Plugin Name", "Popularity", "Build Status", "Build Log"]
         ]
 
-        for result in top_250_plugins_results:
-            plugin_name = result.get("plugin_name", "Unknown")
-            popularity = result.get("popularity", "Unknown")
-            build_status = result.get("build_status", "Unknown")
+        def log_link(plugin_name):
             log_filename = f"{plugin_name}.log"
-            log_exists = log_filename in available_logs
-            if log_exists:
-                log_url = f"https://github.com/gounthar/alpha-omega-stats/blob/{current_branch}/data/plugin-build-logs/{log_filename}"
-                log_link = f'=HYPERLINK("{log_url}"; "View Log")'
-            else:
-                log_link = ""
-            top_250_plugins_data.append([
-                plugin_name,
-                popularity,
-                build_status,
-                log_link
-            ])
-
-        # Update the sheet
-        update_sheet_with_retry(top_250_plugins_sheet, top_250_plugins_data)
-
-        # Format the header row
-        format_sheet_with_retry(top_250_plugins_sheet, "A3:D3", {
-            "textFormat": {
-                "bold": True
-            },
-            "backgroundColor": {
-                "red": 0.9,
-                "green": 0.9,
-                "blue": 0.9,
-                "alpha": 1.0
-            },
-            "horizontalAlignment": "CENTER"
-        })
+            if log_filename not in available_logs:
+                return ""
+            log_url = f"https://github.com/gounthar/alpha-omega-stats/blob/{current_branch}/data/plugin-build-logs/{log_filename}"
+            return f'=HYPERLINK("{log_url}"; "View Log")'
+
+        top_250_plugins_data += [
+            [plugin_name, result.get("popularity", "Unknown"), result.get("build_status", "Unknown"), log_link(plugin_name)]
+            for result in top_250_plugins_results
+            for plugin_name in [result.get("plugin_name", "Unknown")]
+        ]
+
+        # Queue the sheet with its header row format
+        update_sheet_if_changed(top_250_plugins_sheet, top_250_plugins_data, [
+            format_request(top_250_plugins_sheet, "A3:D3", COLUMN_TITLE_FORMAT)
+        ])
 
         logging.info("Successfully created/updated Top 250 Plugins sheet")
 
@@ -1088,80 +1284,27 @@ if top_250_plugins_results:
 else:
     logging.warning("No build results found for Top 250 Plugins or file not available")
 
-# Log the summary data for debugging
-logging.info(f"Summary data has {len(summary_data)} rows")
-logging.info(f"First few rows: {summary_data[:5]}")
-if len(summary_data) > 10:
-    logging.info(f"Rows 10-15: {summary_data[10:15]}")
-
-# Update the summary sheet
-update_sheet_with_retry(summary_sheet, summary_data)
-
-# Reorder sheets to make the Summary sheet first
-sheets = spreadsheet.worksheets()
-if sheets[0].title != "Summary":
-    summary_sheet_index = next((i for i, sheet in enumerate(sheets) if sheet.title == "Summary"), None)
-    if summary_sheet_index is not None:
-        spreadsheet.reorder_worksheets(
-            [sheets[summary_sheet_index]] + [sheet for i, sheet in enumerate(sheets) if i != summary_sheet_index])
-
-# Format the summary sheet
-format_sheet_with_retry(summary_sheet, "A1:F1", {
-    "textFormat": {
-        "bold": True
-    },
-    "backgroundColor": {
-        "red": 0.9,  # Light gray background
-        "green": 0.9,
-        "blue": 0.9,
-        "alpha": 1.0
-    },
-    "horizontalAlignment": "CENTER"  # Center-align the text
-})
-
-# Process successful builds data
-successful_builds = process_successful_builds_data(SUCCESSFUL_BUILDS_FILE)
-
 # Create a new sheet for failing PRs
 if failing_prs and isinstance(failing_prs, list):
-    try:
-        failing_prs_sheet = spreadsheet.worksheet("Failing PRs")
-        logging.info("Failing PRs sheet already exists. Updating it...")
-    except gspread.exceptions.WorksheetNotFound:
-        logging.info("Creating new Failing PRs sheet...")
-        failing_prs_sheet = spreadsheet.add_worksheet(title="Failing PRs", rows=100, cols=10)
+    failing_prs_sheet = get_or_create_worksheet_with_retry(spreadsheet, "Failing PRs")
 
     # Prepare the data for the failing PRs sheet
     failing_prs_data = [
         ["Back to Summary", f'=HYPERLINK("#gid={summary_sheet_id}"; "Back to Summary")', "", "", ""],
         ["", "", "", "", ""],  # Empty row for spacing
-        ["Title", "URL", "Status"]
+        ["Title", "URL", "Status"],
+        # One row per failing PR
+        *(
+            [pr["title"], f'=HYPERLINK("{pr["url"]}"; "{pr["url"]}")', pr["status"]]
+            for pr in failing_prs
+        )
     ]
 
-    # Process each failing PR
-    for pr in failing_prs:
-        failing_prs_data.append([
-            pr["title"],
-            f'=HYPERLINK("{pr["url"]}"; "{pr["url"]}")',
-            pr["status"]
-        ])
-
-    # Clear the sheet and update it with the new data
-    update_sheet_with_retry(failing_prs_sheet, failing_prs_data)
-
-    # Format the column titles (bold font and background color)
-    format_sheet_with_retry(failing_prs_sheet, "A3:C3", {  # Format only the column titles (row 3)
-        "textFormat": {
-            "bold": True
-        },
-        "backgroundColor": {
-            "red": 0.9,  # Light gray background
-            "green": 0.9,
-            "blue": 0.9,
-            "alpha": 1.0
-        },
-        "horizontalAlignment": "CENTER"  # Center-align the text
-    })
+    # Queue the new data and the column title format (row 3) for the final batch,
+    # unless the sheet already holds it
+    update_sheet_if_changed(failing_prs_sheet, failing_prs_data, [
+        format_request(failing_prs_sheet, "A3:C3", COLUMN_TITLE_FORMAT)
+    ])
 
     # Calculate failing PRs count
     failing_prs_count = len(failing_prs)
@@ -1174,95 +1317,139 @@ if failing_prs and 'failing_prs_sheet' in locals():
     summary_data.append(["Failing PRs", failing_prs_count, "", "", "", f'=HYPERLINK("#gid={failing_prs_sheet.id}"; "Failing PRs")'])
 else:
     summary_data.append(["Failing PRs", failing_prs_count, "", "", "", "No failing PRs found"])
-update_sheet_with_retry(summary_sheet, summary_data)
 
-# Iterate through each PR group and create a new sheet for each title
-for pr in grouped_prs:
+# Log the summary data for debugging
+logging.info(f"Summary data has {len(summary_data)} rows")
+logging.info(f"First few rows: {summary_data[:5]}")
+if len(summary_data) > 10:
+    logging.info(f"Rows 10-15: {summary_data[10:15]}")
+
+# The complete summary is written together with the PR sheets at the end
+
+# Format the summary sheet, sent only when the summary is rewritten
+summary_format_requests = [format_request(summary_sheet, "A1:F1", COLUMN_TITLE_FORMAT)]
+
+# Move the Summary sheet first; the other sheets keep their relative order
+if summary_sheet.index != 0:
+    summary_format_requests.append({
+        "updateSheetProperties": {
+            "properties": {"sheetId": summary_sheet.id, "index": 0},
+            "fields": "index"
+        }
+    })
+
+def pr_row_format(pr):
+    """
+    Build the updateCells row data for one PR: the state color on every cell,
+    and links to the repository and the pull request on the first two cells.
+    """
+    color_cell = STATE_CELL_FORMATS.get(pr["state"], DEFAULT_CELL_FORMAT)
+    background_color = color_cell["userEnteredFormat"]["backgroundColor"]
+    repo_url = f"https://github.com/{pr['repository']}"
+    return {
+        "values": [
+            {"userEnteredFormat": {"backgroundColor": background_color, "textFormat": {"link": {"uri": repo_url}}}},
+            {"userEnteredFormat": {"backgroundColor": background_color, "textFormat": {"link": {"uri": f"{repo_url}/pull/{pr['number']}"}}}},
+            *[color_cell] * (PR_SHEET_COLUMNS - 2)
+        ]
+    }
+
+def build_pr_group_update(pr):
+    """
+    Prepare the PR list for one title.
+    Returns the worksheet, its rows, their content hash and the format requests
+    to send in the final batch, or None when the sheet needs no update.
+    """
     title = pr["title"]
     prs = pr["prs"]
-    sheet_name = sanitize_sheet_name(title)
+    sheet_name = plugin_sheet_names.get(title)
 
     # Prepare the data for the sheet
     data = [
         ["Back to Summary", f'=HYPERLINK("#gid={summary_sheet_id}"; "Back to Summary")', "", "", ""],
         [title, "", "", "", ""],  # Add title without label
         ["", "", "", "", ""],  # Empty row for spacing
-        ["Repository", "PR Number", "State", "Created At", "Updated At"]
+        ["Repository", "PR Number", "State", "Created At", "Updated At"],
+        # One row per PR; the Repository and PR Number cells get their links as
+        # cell formatting below rather than as HYPERLINK formulas
+        *map(list, map(PR_ROW_FIELDS, prs))
     ]
-    for p in prs:
-        # Add hyperlinks to the Repository and PR Number columns
-        repo_link = f'=HYPERLINK("https://github.com/{p["repository"]}"; "{p["repository"]}")'
-        pr_link = f'=HYPERLINK("https://github.com/{p["repository"]}/pull/{p["number"]}"; "{p["number"]}")'
-        data.append([repo_link, pr_link, p["state"], p["createdAt"], p["updatedAt"]])
-
-    try:
-        # Check if a sheet with the same title already exists
-        try:
-            sheet = spreadsheet.worksheet(sheet_name)
-            logging.info(f"Sheet '{sheet_name}' already exists. Updating it...")
-        except gspread.exceptions.WorksheetNotFound:
-            # Create a new sheet if it doesn't exist
-            logging.info(f"Creating new sheet for '{sheet_name}'...")
-            sheet = spreadsheet.add_worksheet(title=sheet_name, rows=100, cols=10)
-
-        # Update sheet with retry logic
-        update_sheet_with_retry(sheet, data)
-
-        # Format the "Back to Summary" row - only format the first cell
-        format_sheet_with_retry(sheet, "A1", {
-            "textFormat": {
-                "fontSize": 10
-            }
-        })
 
-        # Format the title row - only format the first cell
-        format_sheet_with_retry(sheet, "A2", {
-            "textFormat": {
-                "bold": True,
-                "fontSize": 10
-            },
-            "horizontalAlignment": "LEFT"
-        })
+    # Plugin sheets were all created while building the summary
+    sheet = worksheets_by_title.get(sheet_name)
+    if sheet is None:
+        logging.error(f"No sheet available for '{title}'. Skipping.")
+        return None
 
-        # Format the column titles
-        format_sheet_with_retry(sheet, "A4:E4", {
-            "textFormat": {
-                "bold": True
-            },
-            "backgroundColor": {
-                "red": 0.9,
-                "green": 0.9,
-                "blue": 0.9,
-                "alpha": 1.0
-            },
-            "horizontalAlignment": "CENTER"
-        })
+    # Nothing to do when the sheet already holds exactly this data
+    content_hash = data_hash(data)
+    if sheet_is_unchanged(sheet_name, content_hash):
+        logging.info(f"Sheet '{sheet_name}' is unchanged. Skipping.")
+        return None
 
-        # Apply conditional formatting based on PR state
-        format_requests = []
-        for row_idx, p in enumerate(prs, start=5):  # Start from row 5 (skip header, title, and "Back to Summary" rows)
-            color = {
-                "MERGED": {"red": 0.0, "green": 1.0, "blue": 0.0, "alpha": 1.0},
-                "OPEN": {"red": 1.0, "green": 0.5, "blue": 0.0, "alpha": 1.0},
-                "CLOSED": {"red": 1.0, "green": 0.0, "blue": 0.0, "alpha": 1.0},
-            }.get(p["state"], {"red": 1.0, "green": 1.0, "blue": 1.0, "alpha": 1.0})
-
-            format_requests.append({
-                "range": f"A{row_idx}:E{row_idx}",
-                "format": {
-                    "backgroundColor": color
-                }
-            })
+    logging.info(f"Queueing update for sheet '{sheet_name}'...")
 
-        # Apply all formatting requests in a single batch
-        if format_requests:
-            batch_format_with_retry(sheet, format_requests)
+    # Queue the header formatting; it is the same on every PR sheet
+    format_requests = [
+        format_request(sheet, range_name, format_dict)
+        for range_name, format_dict in PR_SHEET_HEADER_FORMATS
+    ]
 
-        # Add a longer delay between sheets to avoid rate limits
-        time.sleep(10)  # Increased delay between sheets
+    # Queue conditional formatting based on PR state and the GitHub links: one
+    # updateCells request covers every PR row of the sheet
+    format_requests.append({
+        "updateCells": {
+            "range": {
+                "sheetId": sheet.id,
+                "startRowIndex": PR_SHEET_HEADER_ROWS,  # Skip header, title, and "Back to Summary" rows
+                "endRowIndex": PR_SHEET_HEADER_ROWS + len(prs),
+                "startColumnIndex": 0,
+                "endColumnIndex": PR_SHEET_COLUMNS
+            },
+            "rows": [pr_row_format(p) for p in prs],
+            "fields": "userEnteredFormat.backgroundColor,userEnteredFormat.textFormat.link"
+        }
+    })
 
-    except gspread.exceptions.APIError as e:
-        logging.error(f"Failed to update sheet '{sheet_name}': {e}")
-        continue
+    return sheet, data, content_hash, format_requests
+
+# Prepare every PR sheet first, then write them all with batched values updates
+sheet_updates = pending_sheet_updates + [update for update in map(build_pr_group_update, grouped_prs) if update is not None]
+
+# Write the summary in the same batch as the other sheets, unless it is unchanged too
+summary_hash = data_hash(summary_data)
+if not sheet_is_unchanged(summary_sheet.title, summary_hash):
+    sheet_updates.insert(0, (summary_sheet, summary_data, summary_hash, summary_format_requests))
+
+# Two writes to one sheet in the same run would race across chunks, keep the last
+updates_by_title = {}
+for update in sheet_updates:
+    if update[0].title in updates_by_title:
+        logging.warning(f"Sheet '{update[0].title}' was prepared more than once. Keeping the last version.")
+    updates_by_title[update[0].title] = update
+sheet_updates = list(updates_by_title.values())
+if sheet_updates:
+    logging.info(f"Updating {len(sheet_updates)} sheets...")
+    for sheet, _, _, _ in sheet_updates:
+        current_hashes.pop(sheet.title, None)
+    update_sheets_with_retry(spreadsheet, [(sheet, data) for sheet, data, _, _ in sheet_updates])
+
+# Apply the formats of every rewritten sheet, including the PR sheet headers and
+# state colors, at once
+pending_format_requests = [
+    request for _, _, _, format_requests in sheet_updates for request in format_requests
+]
+if pending_format_requests:
+    batch_update_with_retry(spreadsheet, pending_format_requests)
+current_hashes.update((sheet.title, content_hash) for sheet, _, content_hash, _ in sheet_updates)
+
+# Record the hashes of the sheets written successfully so the next run can skip them
+if current_hashes != previous_hashes:
+    meta_sheet = worksheets_by_title.get(META_SHEET_TITLE)
+    if meta_sheet is None:
+        meta_sheet = create_worksheets_with_retry(spreadsheet, [META_SHEET_TITLE], hidden=True)[META_SHEET_TITLE]
+    # Written RAW so titles such as 1.0, TRUE or =x read back exactly as they were written
+    update_sheet_with_retry(meta_sheet, [["Sheet", "SHA-256"]] + sorted([name, h] for name, h in current_hashes.items()),
+                            value_input_option="RAW")
 
 logging.info("Data has been uploaded to Google Sheets.")